@@ -3,6 +3,7 @@ import sys
 import socketio
 import chess
 import asyncio
+import time
 
 # ─── Networking setup ───────────────────────────
 # Use the asynchronous client from socketio
@@ -17,6 +18,10 @@ game_over_message = ""
 replay_chosen = False
 waiting_for_opponent = False
 sel_sq = None
+# Set whenever the position or orientation changes so draw_board() re-renders.
+board_dirty = True
+# Set whenever anything on screen may have changed; idle frames skip rendering.
+needs_redraw = True
 
 
 @sio.event
@@ -33,20 +38,32 @@ async def on_start(data):
         game_over_display, \
         replay_chosen, \
         waiting_for_opponent, \
-        sel_sq
+        sel_sq, \
+        board_dirty, \
+        needs_redraw
     board = chess.Board(data["fen"])
     my_color = data["your_color"]
+    _rebuild_coord_tables(my_color)
     game_over_display = False
     replay_chosen = False
     waiting_for_opponent = False
     sel_sq = None
+    board_dirty = True
+    needs_redraw = True
     print("Game start! You are", my_color)
 
 
 @sio.on("move")
 async def on_move(data):
-    global board
-    board.set_fen(data["fen"])
+    global board, board_dirty, needs_redraw
+    # The server periodically includes the FEN; take it as authoritative so a
+    # drifted board is repaired before we ever push onto it.
+    if "fen" in data:
+        board.set_fen(data["fen"])
+    else:
+        board.push(chess.Move.from_uci(data["uci"]))
+    board_dirty = True
+    needs_redraw = True
 
 
 @sio.on("invalid")
@@ -56,18 +73,28 @@ async def on_invalid(data):
 
 @sio.on("game_over")
 async def on_game_over(data):
-    global game_over_display, game_over_message
+    global game_over_display, game_over_message, needs_redraw
     game_over_display = True
     game_over_message = "Game over: " + data["result"]
+    needs_redraw = True
     print(game_over_message)
 
 
 @sio.on("replay_start")
 async def on_replay_start(data):
-    global board, game_over_display, sel_sq, replay_chosen, waiting_for_opponent
+    global \
+        board, \
+        game_over_display, \
+        sel_sq, \
+        replay_chosen, \
+        waiting_for_opponent, \
+        board_dirty, \
+        needs_redraw
     board = chess.Board(data["fen"])
     game_over_display = False
     sel_sq = None
+    board_dirty = True
+    needs_redraw = True
     replay_chosen = False
     waiting_for_opponent = False
     print("Game restarted!")
@@ -92,110 +119,176 @@ size = 800
 screen = pygame.display.set_mode((size, size))
 clock = pygame.time.Clock()
 
+# Target frame times; the game-over screen is static enough for a lower rate.
+FRAME_DT = 1 / 60
+GAME_OVER_FRAME_DT = 1 / 30
+
 # Set up a font for drawing text.
 font = pygame.font.Font(None, 36)
 
-# Load images for the chess pieces.
+# Turn indicator text keyed by board.turn, rendered once.
+TURN_SURFS = {
+    True: font.render("White's turn", True, pygame.Color("white")).convert_alpha(),
+    False: font.render("Black's turn", True, pygame.Color("white")).convert_alpha(),
+}
+
+CELL = size // 8
+
+# Load images for the chess pieces, converted to the display's pixel format
+# so blits take the fast path.
 images = {}
 for piece in ["P", "N", "B", "R", "Q", "K", "p", "n", "b", "r", "q", "k"]:
     images[piece] = pygame.transform.scale(
-        pygame.image.load(f"images/{piece}.png"), (size // 8, size // 8)
-    )
+        pygame.image.load(f"images/{piece}.png"), (CELL, CELL)
+    ).convert_alpha()
 
-CELL = size // 8
 LIGHT = pygame.Color("#F0D9B5")
 DARK = pygame.Color("#B58863")
 
 
-def get_square_from_mouse(pos):
-    """Maps mouse coordinates to a chess square (file, rank) based on board orientation."""
-    x, y = pos
-    j = x // CELL  # column on screen
-    i = y // CELL  # row on screen
-    if my_color == "black":
-        file = 7 - j
-        rank = i
-    else:
-        file = j
-        rank = 7 - i
-    return chess.square(file, rank)
-
-
-def draw_board():
-    # Draw each square and then any piece on that square.
+def _build_checker(color):
+    """Renders the light/dark squares once, oriented for the given player color."""
+    surface = pygame.Surface((size, size)).convert()
     for i in range(8):
         for j in range(8):
-            if my_color == "black":
+            if color == "black":
                 board_file = 7 - j
                 board_rank = i
             else:
                 board_file = j
                 board_rank = 7 - i
-
-            rect = pygame.Rect(j * CELL, i * CELL, CELL, CELL)
             square_color = LIGHT if ((board_file + board_rank) % 2 == 0) else DARK
-            pygame.draw.rect(screen, square_color, rect)
-            piece = board.piece_at(chess.square(board_file, board_rank))
-            if piece:
-                img = images[piece.symbol()]
-                screen.blit(img, rect.topleft)
+            surface.fill(square_color, pygame.Rect(j * CELL, i * CELL, CELL, CELL))
+    return surface
 
-    if sel_sq is not None:
-        file = chess.square_file(sel_sq)
-        rank = chess.square_rank(sel_sq)
-        if my_color == "black":
-            j = 7 - file
-            i = rank
+
+CHECKER_WHITE = _build_checker("white")
+CHECKER_BLACK = _build_checker("black")
+
+# Pre-rendered squares and pieces, rebuilt only when board_dirty is set.
+board_surface = pygame.Surface((size, size)).convert()
+
+
+# Square <-> screen lookup tables for the current orientation, filled in place
+# by _rebuild_coord_tables() whenever my_color is assigned.
+SQ_TO_XY = [(0, 0)] * 64
+XY_TO_SQ = [[0] * 8 for _ in range(8)]
+
+
+def _rebuild_coord_tables(color):
+    """Maps every square to its top-left pixel and every screen cell back to its square."""
+    for i in range(8):
+        for j in range(8):
+            if color == "black":
+                sq = chess.square(7 - j, i)
+            else:
+                sq = chess.square(j, 7 - i)
+            SQ_TO_XY[sq] = (j * CELL, i * CELL)
+            XY_TO_SQ[i][j] = sq
+
+
+_rebuild_coord_tables(my_color)
+
+
+def get_square_from_mouse(pos):
+    """Maps mouse coordinates to a chess square (file, rank) based on board orientation."""
+    return XY_TO_SQ[pos[1] // CELL][pos[0] // CELL]
+
+
+def draw_board():
+    global board_dirty
+    if board_dirty:
+        # Lay down the checkerboard, then every piece in one batched blit.
+        board_surface.blit(
+            CHECKER_BLACK if my_color == "black" else CHECKER_WHITE, (0, 0)
+        )
+        pairs = [
+            (images[piece.symbol()], SQ_TO_XY[sq])
+            for sq, piece in board.piece_map().items()
+        ]
+        if hasattr(board_surface, "fblits"):
+            board_surface.fblits(pairs)
         else:
-            j = file
-            i = 7 - rank
-        highlight_rect = pygame.Rect(j * CELL, i * CELL, CELL, CELL)
+            board_surface.blits(pairs, doreturn=False)
+        board_dirty = False
+    screen.blit(board_surface, (0, 0))
+
+    # The highlight goes straight onto the screen so selection changes stay cheap.
+    if sel_sq is not None:
+        highlight_rect = pygame.Rect(SQ_TO_XY[sel_sq], (CELL, CELL))
         pygame.draw.rect(screen, pygame.Color("yellow"), highlight_rect, 3)
 
 
 def draw_turn_indicator():
-    turn_text = "White's turn" if board.turn else "Black's turn"
-    text_surface = font.render(turn_text, True, pygame.Color("white"))
-    screen.blit(text_surface, (10, 10))
+    screen.blit(TURN_SURFS[board.turn], (10, 10))
 
 
-def draw_game_over_overlay():
-    """Draw the overlay displaying the game over message and Replay/Quit buttons."""
-    overlay = pygame.Surface((size, size))
-    overlay.set_alpha(200)
-    overlay.fill((0, 0, 0))
-    screen.blit(overlay, (0, 0))
+_REPLAY_RECT = pygame.Rect(size // 2 - 100, size // 2 + 20, 80, 40)
+_QUIT_RECT = pygame.Rect(size // 2 + 20, size // 2 + 20, 80, 40)
+
+# Pre-composed overlay and the message it was built for; rebuilt only when the
+# game over message changes.
+_OVERLAY_SURF = None
+_overlay_message = None
 
-    message_surface = font.render(game_over_message, True, pygame.Color("white"))
-    message_rect = message_surface.get_rect(center=(size // 2, size // 2 - 40))
-    screen.blit(message_surface, message_rect)
 
-    replay_button_rect = pygame.Rect(size // 2 - 100, size // 2 + 20, 80, 40)
-    quit_button_rect = pygame.Rect(size // 2 + 20, size // 2 + 20, 80, 40)
+def _overlay_rects():
+    """Returns the Replay/Quit button rects without drawing anything."""
+    return _REPLAY_RECT, _QUIT_RECT
 
-    pygame.draw.rect(screen, pygame.Color("green"), replay_button_rect)
-    pygame.draw.rect(screen, pygame.Color("red"), quit_button_rect)
+
+def _build_overlay(message):
+    """Composes the translucent backdrop, message and buttons into one surface."""
+    overlay = pygame.Surface((size, size), pygame.SRCALPHA)
+    overlay.fill((0, 0, 0, 200))
+
+    message_surface = font.render(message, True, pygame.Color("white"))
+    message_rect = message_surface.get_rect(center=(size // 2, size // 2 - 40))
+    overlay.blit(message_surface, message_rect)
+
+    pygame.draw.rect(overlay, pygame.Color("green"), _REPLAY_RECT)
+    pygame.draw.rect(overlay, pygame.Color("red"), _QUIT_RECT)
 
     replay_text = font.render("Replay", True, pygame.Color("white"))
     quit_text = font.render("Quit", True, pygame.Color("white"))
-    screen.blit(replay_text, replay_text.get_rect(center=replay_button_rect.center))
-    screen.blit(quit_text, quit_text.get_rect(center=quit_button_rect.center))
+    overlay.blit(replay_text, replay_text.get_rect(center=_REPLAY_RECT.center))
+    overlay.blit(quit_text, quit_text.get_rect(center=_QUIT_RECT.center))
+    return overlay
 
-    return replay_button_rect, quit_button_rect
+
+def draw_game_over_overlay():
+    """Draw the overlay displaying the game over message and Replay/Quit buttons."""
+    global _OVERLAY_SURF, _overlay_message
+    if _OVERLAY_SURF is None or _overlay_message != game_over_message:
+        _OVERLAY_SURF = _build_overlay(game_over_message)
+        _overlay_message = game_over_message
+    screen.blit(_OVERLAY_SURF, (0, 0))
+    return _overlay_rects()
 
 
 async def game_loop():
-    global sel_sq, replay_chosen, waiting_for_opponent
+    global sel_sq, replay_chosen, waiting_for_opponent, needs_redraw
+    last = time.monotonic()
+    drawn_sel_sq = None  # selection currently shown on the display
     while True:
+        # Sleep off whatever is left of the previous frame so socketio gets the
+        # event loop instead of us spinning.
+        frame_dt = GAME_OVER_FRAME_DT if game_over_display else FRAME_DT
+        elapsed = time.monotonic() - last
+        await asyncio.sleep(max(0, frame_dt - elapsed))
+        last = time.monotonic()
+
         if game_over_display:
+            replay_button_rect, quit_button_rect = _overlay_rects()
             for ev in pygame.event.get():
                 if ev.type == pygame.QUIT:
                     await sio.disconnect()
                     pygame.quit()
                     sys.exit()
+                elif ev.type == pygame.VIDEOEXPOSE:
+                    needs_redraw = True
                 elif ev.type == pygame.MOUSEBUTTONDOWN:
                     pos = ev.pos
-                    replay_button_rect, quit_button_rect = draw_game_over_overlay()
                     if replay_button_rect.collidepoint(pos):
                         if not replay_chosen:
                             replay_chosen = True
@@ -207,12 +300,13 @@ async def game_loop():
                         await sio.disconnect()
                         pygame.quit()
                         sys.exit()
-            screen.fill((0, 0, 0))
-            draw_board()
-            draw_turn_indicator()
-            draw_game_over_overlay()
-            pygame.display.flip()
-            await asyncio.sleep(1 / 30)
+            if needs_redraw:
+                # The overlay is composited onto the opaque board, not a cleared screen.
+                draw_board()
+                draw_turn_indicator()
+                draw_game_over_overlay()
+                pygame.display.flip()
+                needs_redraw = False
             continue
 
         # Normal gameplay event processing.
@@ -221,22 +315,24 @@ async def game_loop():
                 await sio.disconnect()
                 pygame.quit()
                 sys.exit()
+            elif ev.type == pygame.VIDEOEXPOSE:
+                needs_redraw = True
             elif ev.type == pygame.MOUSEBUTTONDOWN and my_color:
                 sq = get_square_from_mouse(ev.pos)
+                clicked = board.piece_at(sq)
+                owner_is_me = clicked is not None and clicked.color == (
+                    my_color == "white"
+                )
                 if sel_sq is None:
                     # Pick up the piece if it belongs to the player.
-                    if board.piece_at(sq) and board.color_at(sq) == (
-                        my_color == "white"
-                    ):
+                    if owner_is_me:
                         sel_sq = sq
                 else:
-                    if board.piece_at(sq) and board.color_at(sq) == (
-                        my_color == "white"
-                    ):
+                    if owner_is_me:
                         sel_sq = sq
                     else:
                         piece = board.piece_at(sel_sq)
-                        if piece and piece.symbol().lower() == "p":
+                        if piece and piece.piece_type == chess.PAWN:
                             promotion_rank = 7 if my_color == "white" else 0
                             if chess.square_rank(sq) == promotion_rank:
                                 move_obj = chess.Move(sel_sq, sq, promotion=chess.QUEEN)
@@ -244,7 +340,7 @@ async def game_loop():
                                 move_obj = chess.Move(sel_sq, sq)
                         else:
                             move_obj = chess.Move(sel_sq, sq)
-                        if move_obj in board.legal_moves:
+                        if board.is_legal(move_obj):
                             uci = move_obj.uci()
                             payload = {"from": uci[0:2], "to": uci[2:4]}
                             if len(uci) == 5:
@@ -253,11 +349,33 @@ async def game_loop():
                             await sio.emit("move", payload)
                         sel_sq = None
 
-        screen.fill((0, 0, 0))
+        # Nothing arrived and the selection is unchanged: keep the last frame.
+        if not needs_redraw and sel_sq == drawn_sel_sq:
+            continue
+
+        # No fill needed: the opaque board cache covers the whole screen.
+        board_rebuilt = board_dirty
         draw_board()
         draw_turn_indicator()
-        pygame.display.flip()
-        await asyncio.sleep(0)  # roughly 30 FPS
+
+        # Only push the cells whose highlight changed, unless the board itself
+        # was redrawn; a single small rect is where update() beats flip().
+        dirty = []
+        if sel_sq != drawn_sel_sq:
+            for sq in (drawn_sel_sq, sel_sq):
+                if sq is not None:
+                    dirty.append(pygame.Rect(SQ_TO_XY[sq], (CELL, CELL)))
+            drawn_sel_sq = sel_sq
+        if (
+            not board_rebuilt
+            and not needs_redraw
+            and len(dirty) == 1
+            and dirty[0].w * dirty[0].h < size * size // 4
+        ):
+            pygame.display.update(dirty)
+        else:
+            pygame.display.flip()
+        needs_redraw = False
 
 
 async def main():
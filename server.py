@@ -1,44 +1,99 @@
 import asyncio
+import atexit
+import logging
+import logging.handlers
+import os
+import queue
+from collections import deque
 import socketio
 import chess
 import uvicorn
 
-sio = socketio.AsyncServer(async_mode="asgi", logger=True, cors_allowed_origins="*")
+
+class RawQueueHandler(logging.handlers.QueueHandler):
+    """Enqueues records unformatted; the stock prepare() formats on the caller."""
+
+    def prepare(self, record):
+        return record
+
+
+# Handlers only enqueue records; a background thread formats and writes them so
+# slow stdout never blocks the event loop.
+log = logging.getLogger("chess_server")
+log.setLevel(logging.INFO)
+log.propagate = False
+log_queue = queue.SimpleQueue()
+log.addHandler(RawQueueHandler(log_queue))
+log_listener = logging.handlers.QueueListener(log_queue, logging.StreamHandler())
+log_listener.start()
+atexit.register(log_listener.stop)
+
+# Per-event socketio/engineio logging is costly; enable it only for debugging.
+debug_logging = bool(os.getenv("SOCKETIO_DEBUG"))
+sio = socketio.AsyncServer(
+    async_mode="asgi",
+    logger=debug_logging,
+    engineio_logger=debug_logging,
+    cors_allowed_origins="*",
+)
 app = socketio.ASGIApp(sio)
 
-waiting = []  # Queue of sids waiting for a game
-games = {}  # Mapping: room_id → chess.Board()
+waiting = deque()  # Queue of sids waiting for a game (may hold stale entries)
+waiting_set = set()  # sids actually waiting; entries missing here are skipped
+games = {}  # Mapping: room_id → {"board": chess.Board(), "players": (white, black)}
+sid_to_room = {}  # Mapping: sid → room_id of the game it is playing
 replay_requests = {}  # Mapping: room_id → set of sids that requested a replay
 
+FEN_SYNC_INTERVAL = 10  # Include the full FEN in every Nth move broadcast
+
+
+def enqueue_waiting(sid):
+    if sid not in waiting_set:
+        waiting.append(sid)
+        waiting_set.add(sid)
+
+
+def pop_waiting():
+    """Pop the oldest sid that is still waiting, dropping removed entries."""
+    while waiting:
+        sid = waiting.popleft()
+        if sid in waiting_set:
+            waiting_set.discard(sid)
+            return sid
+    return None
+
 
 @sio.event
 async def connect(sid, environ):
-    print("connect", sid)
+    log.info("connect %s", sid)
 
 
 @sio.event
 async def join(sid, data):
     """Client says “I want a game”."""
-    waiting.append(sid)
+    enqueue_waiting(sid)
     # If there's already someone waiting, pair them.
-    if len(waiting) >= 2:
-        p1, p2 = waiting.pop(0), waiting.pop(0)
+    if len(waiting_set) >= 2:
+        p1, p2 = pop_waiting(), pop_waiting()
         room = f"room_{p1}_{p2}"
         board = chess.Board()
-        games[room] = board
+        games[room] = {"board": board, "players": (p1, p2)}
+        sid_to_room[p1] = room
+        sid_to_room[p2] = room
 
         # Save each player's session info with room and color
-        await sio.save_session(p1, {"room": room, "color": "white"})
-        await sio.save_session(p2, {"room": room, "color": "black"})
-        await sio.enter_room(p1, room)
-        await sio.enter_room(p2, room)
+        await asyncio.gather(
+            sio.save_session(p1, {"room": room, "color": "white"}),
+            sio.save_session(p2, {"room": room, "color": "black"}),
+            sio.enter_room(p1, room),
+            sio.enter_room(p2, room),
+        )
 
         # Send "start" message with the initial FEN and assigned colors
-        await sio.emit(
-            "start", {"fen": board.fen(), "your_color": "white"}, room=room, to=p1
-        )
-        await sio.emit(
-            "start", {"fen": board.fen(), "your_color": "black"}, room=room, to=p2
+        fen = board.fen()
+        await asyncio.gather(
+            sio.emit("start", {"fen": fen, "your_color": "white"}, room=room, to=p1),
+            sio.emit("start", {"fen": fen, "your_color": "black"}, room=room, to=p2),
         )
 
 
@@ -47,9 +102,10 @@ async def move(sid, data):
     """Data format: { from: "e2", to: "e4", promotion: "q" }."""
     session = await sio.get_session(sid)
     room = session["room"]
-    board = games.get(room)
-    if board is None:
+    game = games.get(room)
+    if game is None:
         return
+    board = game["board"]
 
     # Build a UCI move string
     uci = data["from"] + data["to"]
@@ -58,10 +114,14 @@ async def move(sid, data):
     move = chess.Move.from_uci(uci)
 
     # Validate & apply the move
-    if move in board.legal_moves:
+    if board.is_legal(move):
         board.push(move)
-        # Broadcast the move (and new FEN) to both players.
-        await sio.emit("move", {"uci": uci, "fen": board.fen()}, room=room)
+        # Broadcast the move to both players, with the FEN every few moves so
+        # clients can check they are still in sync.
+        payload = {"uci": uci}
+        if len(board.move_stack) % FEN_SYNC_INTERVAL == 0:
+            payload["fen"] = board.fen()
+        await sio.emit("move", payload, room=room)
         # Check for game end.
         if board.is_game_over():
             result = board.result()
@@ -79,21 +139,21 @@ async def replay(sid, data):
     """
     session = await sio.get_session(sid)
     room = session.get("room")
-    if not room:
+    if not room or room not in games:
         return
 
     # Record the replay request from this client.
     if room not in replay_requests:
         replay_requests[room] = set()
     replay_requests[room].add(sid)
-    print(f"Replay requested from {sid} in room {room}.")
+    log.info("Replay requested from %s in room %s.", sid, room)
 
     # If both players have requested a replay, restart the game.
     if len(replay_requests[room]) == 2:
         new_board = chess.Board()
-        games[room] = new_board
+        games[room]["board"] = new_board
         await sio.emit("replay_start", {"fen": new_board.fen()}, room=room)
-        print(f"Game in room {room} restarted.")
+        log.info("Game in room %s restarted.", room)
         del replay_requests[room]
 
 
@@ -101,23 +161,26 @@ async def replay(sid, data):
 async def quit(sid, data):
     session = await sio.get_session(sid)
     room = session.get("room")
-    if not room:
+    game = games.get(room)
+    if game is None:
         return
 
-    # Determine the opponent's sid based on the room name (format: room_s1_s2).
-    parts = room.split("_")
-    if len(parts) < 3:
-        return
-    s1, s2 = parts[1], parts[2]
+    s1, s2 = game["players"]
     opponent = s2 if sid == s1 else s1
 
     # Inform both clients that the opponent left.
     await sio.emit("opponent_left", room=room)
-    print(f"{sid} quit the game in room {room}. Opponent {opponent} will be re-queued.")
+    log.info(
+        "%s quit the game in room %s. Opponent %s will be re-queued.",
+        sid,
+        room,
+        opponent,
+    )
 
     # Remove the game and any pending replay requests.
-    if room in games:
-        del games[room]
+    games.pop(room, None)
+    sid_to_room.pop(s1, None)
+    sid_to_room.pop(s2, None)
     if room in replay_requests:
         del replay_requests[room]
 
@@ -125,8 +188,7 @@ async def quit(sid, data):
     opp_session = await sio.get_session(opponent)
     if "room" in opp_session:
         del opp_session["room"]
-    if opponent not in waiting:
-        waiting.append(opponent)
+    enqueue_waiting(opponent)
 
     # Remove the quitting client's association with the room.
     await sio.leave_room(sid, room)
@@ -135,20 +197,20 @@ async def quit(sid, data):
 @sio.event
 async def disconnect(sid):
     # Clean up waiting queue and any active game where the sid is involved.
-    print("disconnect", sid)
-    if sid in waiting:
-        waiting.remove(sid)
+    log.info("disconnect %s", sid)
+    # Leave the deque entry in place; pop_waiting() skips it.
+    waiting_set.discard(sid)
     # If sid is part of an ongoing game, notify the opponent and remove the game.
-    for room, board in list(games.items()):
-        s1, s2 = room.split("_")[1:]
-        if sid in (s1, s2):
-            opponent = s2 if sid == s1 else s1
-            await sio.emit("opponent_left", room=room)
-            del games[room]
-            if room in replay_requests:
-                del replay_requests[room]
-            break
+    room = sid_to_room.pop(sid, None)
+    if room is not None and room in games:
+        s1, s2 = games.pop(room)["players"]
+        opponent = s2 if sid == s1 else s1
+        sid_to_room.pop(opponent, None)
+        await sio.emit("opponent_left", room=room)
+        if room in replay_requests:
+            del replay_requests[room]
 
 
 if __name__ == "__main__":
-    uvicorn.run(app, host="0.0.0.0", port=8080)
+    # loop/http default to "auto", which picks uvloop and httptools when installed.
+    uvicorn.run(app, host="0.0.0.0", port=8080, log_level="warning")